@@ -0,0 +1,207 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from metrics import counter, gauge, histogram
+
+QUEUE_WAIT_SECONDS = histogram(
+    "greenbite_admission_queue_wait_seconds",
+    "Time admitted requests spent queued before running.",
+    ["endpoint"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0),
+)
+REJECTED = counter("greenbite_admission_rejected_total", "Requests shed by admission control.", ["endpoint", "reason"])
+IN_FLIGHT = gauge("greenbite_admission_in_flight", "Requests currently running per endpoint.", ["endpoint"])
+WAITING = gauge("greenbite_admission_waiting", "Requests currently queued per endpoint.", ["endpoint"])
+
+# Request threads per Flask worker process (gunicorn.conf.py starts gunicorn with this many)
+WORKER_THREADS = int(os.environ.get("GREENBITE_THREADS", 16))
+
+class Overloaded(Exception):
+    """ Raised when a request cannot be admitted in time. """
+
+    def __init__(self, gate, reason):
+        super().__init__(f"{gate.name}: {reason}")
+        self.gate = gate
+        self.reason = reason
+        self.retry_after = gate.retry_after
+
+class AdmissionGate:
+    """
+    Bounded concurrency for one endpoint, with a bounded FIFO wait queue.
+
+    Up to `max_concurrency` requests run at once and up to `max_queue` more
+    may wait, each for at most `deadline` seconds. Anything beyond that is
+    rejected immediately so the caller can answer with a fast 503. A freed
+    slot is handed to the longest-waiting request, and new arrivals never
+    skip ahead of a non-empty queue.
+    """
+
+    def __init__(self, name, max_concurrency, max_queue, deadline, retry_after=1):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.deadline = deadline
+        self.retry_after = retry_after
+        self._free = max_concurrency
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+
+        self._queue_wait = QUEUE_WAIT_SECONDS.labels(name)
+        self._rejected_full = REJECTED.labels(name, "queue_full")
+        self._rejected_deadline = REJECTED.labels(name, "deadline")
+        IN_FLIGHT.labels(name).set_function(lambda: self.in_flight)
+        WAITING.labels(name).set_function(lambda: self.waiting)
+
+    def _new_waiter(self):
+        return threading.Event()
+
+    def _wake(self, waiter):
+        waiter.set()
+
+    def _is_woken(self, waiter):
+        return waiter.is_set()
+
+    def _try_admit(self):
+        """ Take a free slot if nobody is queued, else join the queue; returns the waiter or None. """
+        with self._lock:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                self._admit(0.0)
+                return None
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                self._rejected_full.inc()
+                raise Overloaded(self, "queue full")
+            waiter = self._new_waiter()
+            self._waiters.append(waiter)
+            self.waiting += 1
+            return waiter
+
+    def _finish_wait(self, waiter, waited):
+        """ Leave the queue: admitted if a slot was handed over (even right at the deadline). """
+        with self._lock:
+            self.waiting -= 1
+            if not self._is_woken(waiter):
+                self._waiters.remove(waiter)
+                self.rejected += 1
+                self._rejected_deadline.inc()
+                raise Overloaded(self, "queue deadline exceeded")
+            self._admit(waited)
+
+    def _admit(self, waited):
+        self.in_flight += 1
+        self.admitted += 1
+        self.queue_wait_total += waited
+        self.queue_wait_max = max(self.queue_wait_max, waited)
+        self._queue_wait.observe(waited)
+
+    def acquire(self):
+        """ Wait for a slot, returning the seconds spent queued, or raise Overloaded. """
+        waiter = self._try_admit()
+        if waiter is None:
+            return 0.0
+
+        started = time.monotonic()
+        waiter.wait(timeout=self.deadline)
+        waited = time.monotonic() - started
+        self._finish_wait(waiter, waited)
+        return waited
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+            if self._waiters:
+                # Hand the slot straight to the oldest waiter
+                self._wake(self._waiters.popleft())
+            else:
+                self._free += 1
+
+    def stats(self):
+        """ Snapshot of the gate's configuration and counters. """
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "deadline_seconds": self.deadline,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "queue_wait_seconds_total": round(self.queue_wait_total, 6),
+                "queue_wait_seconds_max": round(self.queue_wait_max, 6),
+            }
+
+class AsyncAdmissionGate(AdmissionGate):
+    """ AdmissionGate for asyncio servers: waiting requests yield to the event loop. """
+
+    def _new_waiter(self):
+        return asyncio.get_running_loop().create_future()
+
+    def _wake(self, waiter):
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def _is_woken(self, waiter):
+        return waiter.done() and not waiter.cancelled()
+
+    async def acquire(self):
+        waiter = self._try_admit()
+        if waiter is None:
+            return 0.0
+
+        started = time.monotonic()
+        try:
+            # Shielded so a timeout doesn't cancel a slot handed over at the last moment
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.deadline)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # Client went away while queued: give back a slot it was handed, or leave the queue
+            with self._lock:
+                self.waiting -= 1
+                if self._is_woken(waiter):
+                    self.in_flight += 1
+                else:
+                    self._waiters.remove(waiter)
+            if self._is_woken(waiter):
+                self.release()
+            raise
+        waited = time.monotonic() - started
+        self._finish_wait(waiter, waited)
+        return waited
+
+def gate_from_env(name, max_concurrency, max_queue, deadline, gate_class=AdmissionGate):
+    """
+    Build a gate whose limits can be overridden with environment variables, e.g.
+    ADMISSION_SEARCH_CONCURRENCY, ADMISSION_SEARCH_QUEUE and ADMISSION_SEARCH_DEADLINE.
+    """
+    prefix = f"ADMISSION_{name.upper().replace('-', '_')}_"
+    return gate_class(
+        name,
+        max_concurrency=int(os.environ.get(prefix + "CONCURRENCY", max_concurrency)),
+        max_queue=int(os.environ.get(prefix + "QUEUE", max_queue)),
+        deadline=float(os.environ.get(prefix + "DEADLINE", deadline)),
+        retry_after=int(os.environ.get(prefix + "RETRY_AFTER", 1)),
+    )
+
+def check_thread_budget(gates, threads):
+    """
+    Fail at startup if the gates could together hold more than `threads` request
+    threads (running plus queued), since a blocked thread can't serve other endpoints.
+    """
+    held = sum(gate.max_concurrency + gate.max_queue for gate in gates)
+    if held > threads:
+        names = ", ".join(gate.name for gate in gates)
+        raise ValueError(
+            f"Admission gates for {names} can hold {held} threads but only {threads} are budgeted; "
+            "lower their ADMISSION_*_CONCURRENCY/QUEUE or raise GREENBITE_THREADS"
+        )
@@ -0,0 +1,117 @@
+import threading
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+# Prefix ranges up to this size are ranked directly; larger ones use a memoized shortlist
+SCAN_LIMIT = 1000
+SHORTLIST_SIZE = 100
+
+# Most recently used prefix shortlists kept per index
+SHORTLIST_CACHE_SIZE = 1024
+
+# How much one search for a title counts compared to one occurrence in the dataset
+POPULARITY_WEIGHT = 5
+
+class TitleAutocomplete:
+    """
+    Prefix suggestions over recipe titles using a sorted array and binary search.
+
+    Titles are ranked by how often they occur in the dataset plus how often
+    users have searched for them.
+    """
+
+    def __init__(self, titles):
+        # Titles are shown and matched stripped, but the dataset may store them with
+        # surrounding whitespace; keep the most frequent raw spelling to look rows up by
+        counts = Counter()
+        raw_titles = {}
+        for raw, count in Counter(title for title in titles if isinstance(title, str) and title.strip()).most_common():
+            counts[raw.strip()] += count
+            raw_titles.setdefault(raw.strip(), raw)
+        entries = sorted(counts.items(), key=lambda item: (item[0].lower(), -item[1]))
+
+        self._keys = [title.lower() for title, _ in entries]
+        self._titles = [title for title, _ in entries]
+        self._raw_titles = [raw_titles[title] for title, _ in entries]
+        self._counts = np.array([count for _, count in entries], dtype=np.int64)
+        self._searches = np.zeros(len(entries), dtype=np.int64)
+        self._searched = []  # sorted indices of titles searched at least once
+        self._shortlists = OrderedDict()
+        self._shortlists_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._titles)
+
+    def _range(self, prefix):
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + "\uffff", lo)
+        return lo, hi
+
+    def _shortlist(self, prefix, lo, hi):
+        """ Most frequent titles in a large prefix range, memoized for recently used prefixes. """
+        with self._shortlists_lock:
+            shortlist = self._shortlists.get(prefix)
+            if shortlist is not None:
+                self._shortlists.move_to_end(prefix)
+                return shortlist
+
+        counts = self._counts[lo:hi]
+        top = np.argpartition(-counts, SHORTLIST_SIZE)[:SHORTLIST_SIZE]
+        shortlist = sorted((lo + top).tolist())
+
+        with self._shortlists_lock:
+            self._shortlists[prefix] = shortlist
+            if len(self._shortlists) > SHORTLIST_CACHE_SIZE:
+                self._shortlists.popitem(last=False)
+        return shortlist
+
+    def suggest(self, prefix, limit=10):
+        """ Return up to `limit` titles starting with `prefix` (case-insensitive), best first. """
+        prefix = " ".join(prefix.lower().split())
+        if not prefix:
+            return []
+
+        lo, hi = self._range(prefix)
+        if hi - lo <= SCAN_LIMIT:
+            candidates = np.arange(lo, hi)
+        else:
+            # Titles users searched for can outrank the frequency shortlist, so include them too
+            searched = self._searched[bisect_left(self._searched, lo):bisect_left(self._searched, hi)]
+            candidates = np.array(sorted(set(self._shortlist(prefix, lo, hi)).union(searched)), dtype=np.int64)
+
+        scores = self._counts[candidates] + POPULARITY_WEIGHT * self._searches[candidates]
+        ranked = candidates[np.argsort(-scores, kind="stable")[:limit]]
+        return [self._titles[index] for index in ranked]
+
+    def find(self, title):
+        """
+        Return the dataset title matching `title` (exact, else case-insensitive), or None.
+
+        The title is returned exactly as stored in the dataset, so it can be used to select rows.
+        """
+        title = title.strip()
+        key = title.lower()
+        lo = bisect_left(self._keys, key)
+        hi = bisect_right(self._keys, key, lo)
+        if lo == hi:
+            return None
+
+        for index in range(lo, hi):
+            if self._titles[index] == title:
+                return self._raw_titles[index]
+        # Variants are sorted most frequent first
+        return self._raw_titles[lo]
+
+    def record_search(self, title):
+        """ Count a search for an exact dataset title towards its popularity. """
+        title = title.strip()
+        lo = bisect_left(self._keys, title.lower())
+        for index in range(lo, bisect_right(self._keys, title.lower(), lo)):
+            if self._titles[index] == title:
+                if self._searches[index] == 0:
+                    position = bisect_left(self._searched, index)
+                    self._searched.insert(position, index)
+                self._searches[index] += 1
+                return
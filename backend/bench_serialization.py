@@ -0,0 +1,78 @@
+"""
+Benchmark response serialization and compression for typical API payloads.
+
+Compares the stdlib encoder Flask uses by default with `serialization.dumps`,
+and reports bytes on the wire for each supported content encoding.
+
+Usage:
+    python bench_serialization.py [--recipes 50] [--repeat 200]
+"""
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from serialization import COMPRESSION_MIN_SIZE, brotli, compress, dumps, orjson, _default
+
+WORDS = [
+    "chicken", "rice", "tomato", "onion", "garlic", "butter", "flour", "sugar", "milk", "egg",
+    "cheese", "beef", "potato", "carrot", "olive oil", "black pepper", "salt", "lemon", "cream",
+]
+
+def search_payload(recipes):
+    """ Shaped like a /search response. """
+    return {"recipes": [
+        {"title": f"{random.choice(WORDS).title()} Recipe {i}", "ingredients": random.sample(WORDS, 12)}
+        for i in range(recipes)
+    ]}
+
+def compare_payload(recipes):
+    """ Shaped like a /compare-dishes response, with NumPy floats as produced by pandas lookups. """
+    def dish(i):
+        return {
+            "title": f"Dish {i}",
+            "ingredients": [{"name": name, "emission": np.float64(random.random() * 20)} for name in WORDS],
+            "sustainability_score": np.float64(random.random() * 5),
+            "total_emissions": np.float64(random.random() * 50),
+            "emissions_equivalence": {"car_distance": 12.3, "smartphone_charges": 330.0,
+                                      "plastic_bags": 54.0, "led_bulb_hours": 27.0},
+        }
+    return {f"dish{i + 1}": dish(i) for i in range(recipes)} | {"comparison_result": "Dish 1 is more sustainable."}
+
+def stdlib_dumps(obj):
+    """ Equivalent of Flask's default provider (compact, sorted keys, ASCII). """
+    return json.dumps(obj, default=_default, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+def timed(fn, arg, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(arg)
+    return result, (time.perf_counter() - started) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON encoding and compression.")
+    parser.add_argument("--recipes", type=int, default=50, help="Recipes per payload")
+    parser.add_argument("--repeat", type=int, default=200, help="Timing iterations")
+    args = parser.parse_args()
+
+    random.seed(0)
+    print(f"📌 Encoder: {'orjson' if orjson else 'stdlib json'}, brotli: {'yes' if brotli else 'no'}, "
+          f"compression threshold: {COMPRESSION_MIN_SIZE} bytes\n")
+
+    for name, payload in [("search", search_payload(args.recipes)), ("compare-dishes", compare_payload(args.recipes))]:
+        baseline, baseline_ms = timed(stdlib_dumps, payload, args.repeat)
+        body, fast_ms = timed(dumps, payload, args.repeat)
+        print(f"📊 /{name}")
+        print(f"  stdlib json : {len(baseline):>8} bytes  {baseline_ms:7.3f} ms")
+        print(f"  fast dumps  : {len(body):>8} bytes  {fast_ms:7.3f} ms  ({baseline_ms / fast_ms:.1f}x)")
+
+        for encoding in ["gzip"] + (["br"] if brotli else []):
+            compressed, compress_ms = timed(lambda b: compress(b, encoding), body, args.repeat)
+            print(f"  + {encoding:<9} : {len(compressed):>8} bytes  {compress_ms:7.3f} ms  "
+                  f"({len(compressed) / len(body):.0%} of uncompressed)")
+        print()
+
+if __name__ == "__main__":
+    main()
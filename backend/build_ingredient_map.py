@@ -0,0 +1,148 @@
+"""
+Offline job: match every distinct recipe ingredient against the emissions products.
+
+Extracts the ingredient vocabulary from the recipes `NER` column, scores it
+against `Food product` in one vectorized, multi-core pass and stores the best
+match for each ingredient in the persistent match table, so request-time
+matching of known ingredients becomes a lookup. Borderline matches are
+written to a CSV report for manual review.
+
+Usage:
+    python build_ingredient_map.py --report low_confidence_matches.csv
+"""
+import argparse
+import random
+import time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+from thefuzz import process as thefuzz_process
+from thefuzz import utils
+
+from emissions import load_emissions_data
+from ingredients import load_dataset
+from match_table import MATCH_TABLE_PATH, load_match_table
+
+RECIPES_PATH = "C:/greenbite/datasets/filtered_recipes_1m.csv.gz"
+EMISSIONS_PATH = "C:/greenbite/datasets/Food_Product_Emissions.csv"
+
+# thefuzz.process.extractOne preprocesses the query with full_process, then runs
+# full_process(force_ascii=True) on both query and choices before WRatio
+_preprocess = partial(utils.full_process, force_ascii=True)
+
+def extract_vocabulary(recipes):
+    """ Return every distinct cleaned ingredient with its number of occurrences. """
+    ner = recipes["NER"].dropna().astype(str)
+    ner = ner[ner != ""]
+
+    # Same cleaning as extract_ingredients followed by clean_ingredient
+    ingredients = (
+        ner.str.replace(r"[^\w\s,]", "", regex=True)
+        .str.split(",")
+        .explode()
+        .str.strip()
+        .str.lower()
+    )
+    ingredients = ingredients[ingredients != ""]
+    return ingredients.value_counts()
+
+def match_vocabulary(ingredients, products, workers=-1, chunk_size=20000):
+    """ Score ingredients against products, returning the best product index and score for each. """
+    best_index = np.empty(len(ingredients), dtype=np.int64)
+    best_score = np.empty(len(ingredients), dtype=np.float64)
+
+    for start in range(0, len(ingredients), chunk_size):
+        chunk = [utils.full_process(ingredient) for ingredient in ingredients[start:start + chunk_size]]
+        # Same scorer and preprocessing as thefuzz.process.extractOne
+        scores = process.cdist(
+            chunk, products, scorer=fuzz.WRatio, processor=_preprocess,
+            dtype=np.float64, workers=workers
+        )
+        best_index[start:start + len(chunk)] = scores.argmax(axis=1)
+        best_score[start:start + len(chunk)] = scores.max(axis=1)
+        print(f"🔄 Matched {min(start + chunk_size, len(ingredients))}/{len(ingredients)} ingredients")
+
+    # thefuzz reports whole-number scores
+    return best_index, np.rint(best_score).astype(np.int64)
+
+def check_against_thefuzz(ingredients, products, best_index, best_score, sample_size=200):
+    """
+    Compare vectorized matches with thefuzz.process.extractOne, returning the mismatches.
+
+    Every non-ASCII ingredient (where preprocessing differences show up) is checked,
+    plus a random sample of the rest.
+    """
+    non_ascii = [i for i, ingredient in enumerate(ingredients) if not ingredient.isascii()]
+    others = [i for i, ingredient in enumerate(ingredients) if ingredient.isascii()]
+    sample = non_ascii + random.Random(0).sample(others, min(sample_size, len(others)))
+
+    mismatches = []
+    for i in sample:
+        expected = thefuzz_process.extractOne(ingredients[i], products)
+        actual = (products[best_index[i]], int(best_score[i]))
+        if expected is not None and (expected[0], expected[1]) != actual:
+            mismatches.append((ingredients[i], expected, actual))
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute ingredient → emissions product matches.")
+    parser.add_argument("--recipes", default=RECIPES_PATH, help="Recipes dataset (CSV, may be gzipped)")
+    parser.add_argument("--emissions", default=EMISSIONS_PATH, help="Food product emissions CSV")
+    parser.add_argument("--table", default=MATCH_TABLE_PATH, help="Match table to populate")
+    parser.add_argument("--report", help="Write low-confidence matches to this CSV for review")
+    parser.add_argument("--review-below", type=float, default=90,
+                        help="Include matches scoring below this in the report (default: 90)")
+    parser.add_argument("--workers", type=int, default=-1, help="Scoring threads, -1 for all cores")
+    args = parser.parse_args()
+
+    started = time.time()
+    recipes = load_dataset(args.recipes)
+    emissions_dataset = load_emissions_data(args.emissions)
+    if emissions_dataset is None:
+        raise SystemExit("❌ Emissions dataset could not be loaded.")
+
+    vocabulary = extract_vocabulary(recipes)
+    print(f"📌 Found {len(vocabulary)} distinct ingredients across {len(recipes)} recipes")
+
+    ingredients = vocabulary.index.tolist()
+    products = emissions_dataset["Food product"].astype(str).tolist()
+    best_index, best_score = match_vocabulary(ingredients, products, workers=args.workers)
+    best_product = [products[i] for i in best_index]
+
+    mismatches = check_against_thefuzz(ingredients, products, best_index, best_score)
+    if mismatches:
+        for ingredient, expected, actual in mismatches[:20]:
+            print(f"❌ '{ingredient}': thefuzz gives {expected}, vectorized match gives {actual}")
+        raise SystemExit(f"❌ {len(mismatches)} match(es) differ from request-time matching, table not written.")
+
+    # Table used by main.py (products as loaded by load_emissions_data)
+    rows = list(zip(ingredients, best_product, best_score.tolist()))
+    load_match_table(emissions_dataset["Food product"], path=args.table).put_many("thefuzz", rows)
+
+    # Table used by sustainability.py, which lower-cases product names
+    lowered = [product.lower().strip() for product in products]
+    rows = list(zip(ingredients, [lowered[i] for i in best_index], best_score.tolist()))
+    load_match_table(lowered, path=args.table).put_many("thefuzz", rows)
+
+    accepted = int((best_score >= 80).sum())
+    print(f"✅ Stored {len(ingredients)} matches ({accepted} at or above the 80% threshold) "
+          f"in {time.time() - started:.1f}s")
+
+    if args.report:
+        report = pd.DataFrame({
+            "ingredient": ingredients,
+            "occurrences": vocabulary.values,
+            "product": best_product,
+            "score": best_score,
+            "accepted": best_score >= 80,
+        })
+        report = report[report["score"] < args.review_below].sort_values(
+            ["occurrences", "score"], ascending=[False, True]
+        )
+        report.to_csv(args.report, index=False)
+        print(f"📊 Wrote {len(report)} low-confidence matches to {args.report}")
+
+if __name__ == "__main__":
+    main()
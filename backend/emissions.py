@@ -1,9 +1,23 @@
+import time
+import os
 import pandas as pd
 from thefuzz import process
+from metrics import DATASET_LOAD_SECONDS, DATASET_ROWS, counter
+
+INGREDIENT_MATCHES = counter(
+    "greenbite_ingredient_matches_total",
+    "Ingredients matched against the emissions dataset, by outcome and whether the match table had them.",
+    ["result", "source"],
+)
+_MATCH_OUTCOMES = {
+    (matched, cached): INGREDIENT_MATCHES.labels("matched" if matched else "unmatched", "cache" if cached else "fuzzy")
+    for matched in (True, False) for cached in (True, False)
+}
 
 def load_emissions_data(filepath):
     """ Load emissions dataset from CSV file safely. """
     try:
+        started = time.perf_counter()
         emissions_data = pd.read_csv(filepath)
         
         # Ensure required columns exist
@@ -21,6 +35,8 @@ def load_emissions_data(filepath):
             if col not in ["Food product"]:
                 emissions_data[col] = pd.to_numeric(emissions_data[col], errors="coerce").fillna(0)
 
+        DATASET_LOAD_SECONDS.labels(os.path.basename(filepath)).set(time.perf_counter() - started)
+        DATASET_ROWS.labels(os.path.basename(filepath)).set(len(emissions_data))
         print(f"✅ Emissions data loaded successfully from: {filepath}")
         return emissions_data
 
@@ -32,8 +48,8 @@ def clean_ingredient(ingredient):
     """ Standardize ingredient formatting. """
     return ingredient.replace("[", "").replace("]", "").replace('"', "").strip().lower()
 
-def match_ingredients_with_emissions(ingredients, emissions_dataset):
-    """ Match ingredients with emissions dataset using fuzzy matching. """
+def match_ingredients_with_emissions(ingredients, emissions_dataset, match_table=None):
+    """ Match ingredients with emissions dataset using fuzzy matching (cached in `match_table` when given). """
     if emissions_dataset is None:
         print("❌ Error: Emissions dataset not loaded.")
         return {}
@@ -49,7 +65,15 @@ def match_ingredients_with_emissions(ingredients, emissions_dataset):
 
     for ingredient in ingredients:
         cleaned_ingredient = clean_ingredient(ingredient)
-        match = process.extractOne(cleaned_ingredient, emissions_dataset["Food product"].values)
+        match = match_table.get("thefuzz", cleaned_ingredient) if match_table is not None else None
+        cached = match is not None
+
+        if match is None:
+            match = process.extractOne(cleaned_ingredient, emissions_dataset["Food product"].values)
+            if match and match_table is not None:
+                match_table.put("thefuzz", cleaned_ingredient, str(match[0]), match[1])
+
+        _MATCH_OUTCOMES[bool(match and match[1] >= 80), cached].inc()
 
         if match and match[1] >= 80:  # 80% confidence threshold
             matched_data = emissions_dataset.loc[emissions_dataset["Food product"] == match[0]].iloc[0]
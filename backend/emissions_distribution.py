@@ -0,0 +1,189 @@
+"""
+Precomputed distribution of recipe emission totals for percentile ranking.
+
+Every recipe is scored with the same matching and `calculate_total_impact`
+logic the API uses, and the sorted totals are stored next to the datasets
+together with a fingerprint of the dataset files. The API only loads the
+stored file; rebuild it with this script whenever either dataset changes.
+
+Usage:
+    python emissions_distribution.py
+"""
+import contextlib
+import hashlib
+import io
+import os
+import time
+
+import numpy as np
+
+from build_ingredient_map import match_vocabulary
+from emissions import calculate_total_impact, load_emissions_data
+from ingredients import load_dataset
+from match_table import load_match_table
+
+RECIPES_PATH = "C:/greenbite/datasets/filtered_recipes_1m.csv.gz"
+EMISSIONS_PATH = "C:/greenbite/datasets/Food_Product_Emissions.csv"
+DISTRIBUTION_PATH = "C:/greenbite/datasets/emissions_distribution.npz"
+
+def datasets_fingerprint(*paths):
+    """ Cheap fingerprint (size and modification time) of the dataset files the distribution is derived from. """
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{stat.st_size}:{stat.st_mtime_ns}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+def product_totals(emissions_dataset):
+    """ Total emissions contributed by each food product, as calculate_total_impact computes it. """
+    totals = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _, row in emissions_dataset.iterrows():
+            # Request-time lookups use the first row for a product name
+            if row["Food product"] not in totals:
+                totals[row["Food product"]] = calculate_total_impact({row["Food product"]: row.to_dict()})[1]
+    return totals
+
+def recipe_totals(recipes, emissions_dataset, match_table=None):
+    """
+    Total emissions for every recipe with ingredients, in dataset order.
+
+    Matches already in `match_table` are reused; the table itself is only read
+    (build_ingredient_map.py is what populates it).
+    """
+    ner = recipes["NER"].dropna().astype(str)
+    ner = ner[ner != ""]
+
+    # Same cleaning as extract_ingredients followed by clean_ingredient
+    ingredients = (
+        ner.str.replace(r"[^\w\s,]", "", regex=True)
+        .str.split(",")
+        .explode()
+        .str.strip()
+        .str.lower()
+    )
+
+    # Resolve each distinct ingredient once, preferring matches already in the match table
+    products = emissions_dataset["Food product"].astype(str).tolist()
+    vocabulary = ingredients.unique().tolist()
+    resolved = {}
+    unknown = []
+    for ingredient in vocabulary:
+        match = match_table.get("thefuzz", ingredient) if match_table is not None else None
+        if match is None:
+            unknown.append(ingredient)
+        else:
+            resolved[ingredient] = match
+
+    if unknown:
+        best_index, best_score = match_vocabulary(unknown, products)
+        rows = [(ingredient, products[i], score) for ingredient, i, score in zip(unknown, best_index, best_score.tolist())]
+        for ingredient, product, score in rows:
+            resolved[ingredient] = (product, score)
+
+    accepted = {ingredient: product for ingredient, (product, score) in resolved.items() if score >= 80}
+    totals_by_product = product_totals(emissions_dataset)
+
+    # Matches are keyed by product, so an ingredient matched twice counts once per recipe
+    matched = ingredients.map(accepted).dropna().rename("product").rename_axis("recipe").reset_index()
+    matched = matched.drop_duplicates()
+    per_recipe = matched["product"].map(totals_by_product).groupby(matched["recipe"]).sum()
+    return per_recipe.reindex(ner.index, fill_value=0.0).to_numpy(dtype=np.float64)
+
+class EmissionsDistribution:
+    """ Sorted recipe emission totals with O(log n) percentile lookups. """
+
+    def __init__(self, totals, fingerprint):
+        self.totals = np.sort(np.asarray(totals, dtype=np.float64))
+        self.fingerprint = fingerprint
+
+    def __len__(self):
+        return len(self.totals)
+
+    def percent_higher(self, total_emissions):
+        """ Percentage of recipes with strictly higher total emissions than `total_emissions`. """
+        if not len(self.totals):
+            return None
+        higher = len(self.totals) - int(np.searchsorted(self.totals, float(total_emissions), side="right"))
+        return round(100.0 * higher / len(self.totals), 1)
+
+    def save(self, path):
+        """ Write to a temporary file and swap it in, so readers never see a partial file. """
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            # Given a file object, np.savez doesn't append ".npz" to the name
+            with open(temp_path, "wb") as f:
+                np.savez(f, totals=self.totals, fingerprint=np.array(self.fingerprint))
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["totals"], str(data["fingerprint"]))
+
+def build_distribution(recipes, emissions_dataset, fingerprint, match_table=None, path=DISTRIBUTION_PATH):
+    """ Score every recipe, then store and return the resulting distribution. """
+    started = time.time()
+    distribution = EmissionsDistribution(recipe_totals(recipes, emissions_dataset, match_table), fingerprint)
+    distribution.save(path)
+    print(f"✅ Emissions distribution built over {len(distribution)} recipes in {time.time() - started:.1f}s")
+    return distribution
+
+@contextlib.contextmanager
+def build_lock(path):
+    """ Make sure only one build writes the distribution at a time. """
+    lock_path = f"{path}.lock"
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        raise SystemExit(f"❌ Another build holds {lock_path} (delete it if that build is no longer running).")
+    try:
+        os.write(fd, str(os.getpid()).encode("utf-8"))
+        os.close(fd)
+        yield
+    finally:
+        os.remove(lock_path)
+
+class DistributionLoader:
+    """ Serves the stored distribution; it is built offline with `python emissions_distribution.py`. """
+
+    def __init__(self, path=DISTRIBUTION_PATH, recipes_path=RECIPES_PATH, emissions_path=EMISSIONS_PATH):
+        self.distribution = None
+        if not os.path.exists(path):
+            print(f"⚠ No emissions distribution at {path}, percentiles disabled. Run emissions_distribution.py to build it.")
+            return
+
+        try:
+            self.distribution = EmissionsDistribution.load(path)
+        except Exception as e:
+            print(f"❌ Could not load emissions distribution, percentiles disabled: {e}")
+            return
+        print(f"✅ Emissions distribution loaded ({len(self.distribution)} recipes)")
+
+        try:
+            if self.distribution.fingerprint != datasets_fingerprint(recipes_path, emissions_path):
+                print("⚠ Datasets changed since the emissions distribution was built. Run emissions_distribution.py to rebuild it.")
+        except OSError as e:
+            print(f"⚠ Cannot check whether the emissions distribution is current: {e}")
+
+    def percent_higher(self, total_emissions):
+        """ Percentage of recipes with higher emissions, or None while the distribution is unavailable. """
+        distribution = self.distribution
+        return distribution.percent_higher(total_emissions) if distribution is not None else None
+
+def main():
+    recipes = load_dataset(RECIPES_PATH)
+    emissions_dataset = load_emissions_data(EMISSIONS_PATH)
+    if emissions_dataset is None:
+        raise SystemExit("❌ Emissions dataset could not be loaded.")
+
+    with build_lock(DISTRIBUTION_PATH):
+        fingerprint = datasets_fingerprint(RECIPES_PATH, EMISSIONS_PATH)
+        match_table = load_match_table(emissions_dataset["Food product"])
+        build_distribution(recipes, emissions_dataset, fingerprint, match_table)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+# Loaded automatically by `gunicorn main:app` when run from backend/
+from admission import WORKER_THREADS
+
+# Threaded workers, sized to the thread budget main.py's admission gates are checked against
+worker_class = "gthread"
+threads = WORKER_THREADS
@@ -1,6 +1,19 @@
+import os
+import time
 import pandas as pd
 from thefuzz import process
 import re
+from metrics import DATASET_LOAD_SECONDS, DATASET_ROWS, counter
+
+TITLE_SEARCHES = counter(
+    "greenbite_title_searches_total",
+    "Dish name lookups in extract_ingredients, by method and whether any title cleared the threshold.",
+    ["method", "result"],
+)
+_SEARCH_OUTCOMES = {
+    (method, found): TITLE_SEARCHES.labels(method, "found" if found else "empty")
+    for method in ("exact", "fuzzy") for found in (True, False)
+}
 
 # Synonym map for normalization
 synonym_map = {
@@ -30,7 +43,11 @@ synonym_map = {
 
 def load_dataset(file_path):
     """Load a dataset from a CSV file."""
-    return pd.read_csv(file_path)
+    started = time.perf_counter()
+    dataset = pd.read_csv(file_path)
+    DATASET_LOAD_SECONDS.labels(os.path.basename(file_path)).set(time.perf_counter() - started)
+    DATASET_ROWS.labels(os.path.basename(file_path)).set(len(dataset))
+    return dataset
 
 def normalize_input(dish_name):
     """Normalize input dish name using synonyms."""
@@ -49,13 +66,25 @@ def normalize_input(dish_name):
 
     return " ".join(normalized_words)
 
-def extract_ingredients(dish_name, dataset, threshold=80):
-    """Extract multiple recipe options and their ingredients using fuzzy matching."""
-    dish_name = normalize_input(dish_name)
+def extract_ingredients(dish_name, dataset, threshold=80, exact_title=None, title_scorer=None):
+    """Extract multiple recipe options and their ingredients using fuzzy matching.
+
+    When `exact_title` is given (a title known to be in the dataset), fuzzy matching is skipped.
+    `title_scorer` (a ChunkedTitleScorer over the dataset titles) scores titles across all cores.
+    """
+    if exact_title is not None:
+        best_matches = [exact_title]
+    else:
+        dish_name = normalize_input(dish_name)
+
+        # Fuzzy matching
+        if title_scorer is not None:
+            matches = title_scorer.extract(dish_name, limit=5, score_cutoff=threshold)
+        else:
+            matches = process.extract(dish_name, dataset["title"].values, limit=5)
+        best_matches = [match[0] for match in matches if match[1] >= threshold]
 
-    # Fuzzy matching
-    matches = process.extract(dish_name, dataset["title"].values, limit=5)
-    best_matches = [match[0] for match in matches if match[1] >= threshold]
+    _SEARCH_OUTCOMES["exact" if exact_title is not None else "fuzzy", bool(best_matches)].inc()
 
     all_ingredients = []
     matched_titles = []
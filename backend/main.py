@@ -1,4 +1,7 @@
-from flask import Flask, request, jsonify
+from functools import wraps
+import time
+from flask import Flask, Response, g, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 import pandas as pd
 import re
@@ -7,11 +10,43 @@ from ingredients import extract_ingredients, load_dataset
 from emissions import load_emissions_data, match_ingredients_with_emissions, calculate_total_impact, calculate_emissions_equivalence
 from sustainability import get_sustainability_score 
 from sustainability_comparison import compare_sustainability
+from match_table import load_match_table
+from serialization import dumps, loads, choose_encoding, compress
+from autocomplete import TitleAutocomplete
+from emissions_distribution import DistributionLoader, RECIPES_PATH, EMISSIONS_PATH
+from admission import WORKER_THREADS, Overloaded, check_thread_budget, gate_from_env
+from title_matcher import ChunkedTitleScorer
+from metrics import REGISTRY, CONTENT_TYPE, gauge, histogram
+
+
+class FastJSONProvider(JSONProvider):
+    """JSON provider backed by `serialization.dumps` (orjson when installed, NumPy-aware)."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype="application/json")
 
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
+
+REQUEST_LATENCY = histogram(
+    "greenbite_request_duration_seconds",
+    "Request latency per route, method and status code.",
+    ["route", "method", "status"],
+)
 CORS(app, resources={r"/*": {"origins": "http://localhost:3000"}}, supports_credentials=True)
 
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
 @app.before_request
 def handle_preflight_requests():
     if request.method == "OPTIONS":
@@ -22,16 +57,119 @@ def handle_preflight_requests():
         response.headers["Access-Control-Allow-Credentials"] = "true"
         return response, 200
 
+@app.after_request
+def record_request_latency(response):
+    """Observe the request's latency in the per-route histogram."""
+    started = g.get("request_started")
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        REQUEST_LATENCY.labels(route, request.method, str(response.status_code)).observe(time.perf_counter() - started)
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Compress large responses with the best encoding the client accepts."""
+    if response.direct_passthrough or response.status_code < 200 or "Content-Encoding" in response.headers:
+        return response
+
+    body = response.get_data()
+    encoding = choose_encoding(request.headers.get("Accept-Encoding", ""), len(body))
+    if encoding:
+        response.set_data(compress(body, encoding))
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
+
+# Per-endpoint admission control, so slow fuzzy searches can't starve cheap endpoints.
+# Limits apply per worker process, which serves WORKER_THREADS requests at once (see gunicorn.conf.py).
+ADMISSION_GATES = {
+    "search": gate_from_env("search", max_concurrency=2, max_queue=2, deadline=2.0),
+    "compare-dishes": gate_from_env("compare-dishes", max_concurrency=2, max_queue=2, deadline=2.0),
+    "emissions": gate_from_env("emissions", max_concurrency=8, max_queue=32, deadline=1.0),
+    "predict": gate_from_env("predict", max_concurrency=16, max_queue=64, deadline=0.5),
+    "autocomplete": gate_from_env("autocomplete", max_concurrency=16, max_queue=64, deadline=0.5),
+}
+
+# Queued requests block their thread, so the slow endpoints may hold at most half of them
+check_thread_budget([ADMISSION_GATES["search"], ADMISSION_GATES["compare-dishes"]], WORKER_THREADS // 2)
+
+def admission_controlled(name):
+    """Run the view only once its endpoint's gate admits it; otherwise answer 503 with Retry-After."""
+    gate = ADMISSION_GATES[name]
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                gate.acquire()
+            except Overloaded as e:
+                print(f"⚠ Shedding {request.path}: {e.reason}")
+                response = jsonify({"error": "Server is busy, please retry shortly"})
+                response.headers["Retry-After"] = str(e.retry_after)
+                return response, 503
+
+            try:
+                return view(*args, **kwargs)
+            finally:
+                gate.release()
+        return wrapper
+    return decorator
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Expose matcher, dataset, admission and latency metrics in the Prometheus text format."""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+@app.route("/admission", methods=["GET"])
+def admission_stats():
+    """Report per-endpoint admission counters, including time spent queued."""
+    return jsonify({name: gate.stats() for name, gate in ADMISSION_GATES.items()}), 200
+
 # Load datasets with error handling
 try:
-    RECIPES_DATASET = load_dataset("C:/greenbite/datasets/filtered_recipes_1m.csv.gz")
-    EMISSIONS_DATASET = load_emissions_data("C:/greenbite/datasets/Food_Product_Emissions.csv")
+    RECIPES_DATASET = load_dataset(RECIPES_PATH)
+    EMISSIONS_DATASET = load_emissions_data(EMISSIONS_PATH)
     print("✅ Datasets loaded successfully!")
 except Exception as e:
     print(f"❌ Dataset loading error: {e}")
     RECIPES_DATASET, EMISSIONS_DATASET = None, None  # Gracefully handle loading failures
 
+# Persistent ingredient → food product matches, shared across restarts and workers
+MATCH_TABLE = load_match_table(EMISSIONS_DATASET["Food product"]) if EMISSIONS_DATASET is not None else None
+
+if MATCH_TABLE is not None:
+    gauge("greenbite_match_table_entries", "Ingredient matches held in the match table.").set_function(lambda: len(MATCH_TABLE))
+
+# Sorted recipe totals for "lower emissions than X% of recipes" (built offline by emissions_distribution.py)
+EMISSIONS_DISTRIBUTION = DistributionLoader()
+
+def lower_emissions_than_percent(total_emissions):
+    """Percentage of dataset recipes with higher emissions, or None if the distribution isn't ready."""
+    return EMISSIONS_DISTRIBUTION.percent_higher(total_emissions)
+
+# Sorted title index for autocomplete and exact-title lookups
+TITLE_INDEX = TitleAutocomplete(RECIPES_DATASET["title"]) if RECIPES_DATASET is not None else None
+
+# Parallel fuzzy title scorer used by extract_ingredients
+TITLE_SCORER = ChunkedTitleScorer(RECIPES_DATASET["title"].values) if RECIPES_DATASET is not None else None
+
+def find_exact_title(query):
+    """Return the dataset title exactly matching the query (e.g. an autocomplete pick), or None."""
+    return TITLE_INDEX.find(query) if TITLE_INDEX is not None else None
+
+@app.route("/autocomplete", methods=["GET"])
+@admission_controlled("autocomplete")
+def autocomplete():
+    """Suggest dataset titles starting with the typed prefix, most popular first."""
+    if TITLE_INDEX is None:
+        return jsonify({"error": "Recipes dataset not loaded"}), 500
+
+    prefix = request.args.get("q", "")
+    limit = min(max(request.args.get("limit", 10, type=int), 1), 20)
+    return jsonify({"suggestions": TITLE_INDEX.suggest(prefix, limit)}), 200
+
 @app.route("/search", methods=["POST"])
+@admission_controlled("search")
 def search():
     """Extract ingredients from the query and find matching recipes."""
     try:
@@ -53,7 +191,13 @@ def search():
         if RECIPES_DATASET is None:
             return jsonify({"error": "Recipes dataset not loaded"}), 500
 
-        extracted_ingredients, matched_titles = extract_ingredients(query, RECIPES_DATASET)
+        exact_title = find_exact_title(query)
+        if exact_title is not None:
+            TITLE_INDEX.record_search(exact_title)
+
+        extracted_ingredients, matched_titles = extract_ingredients(
+            query, RECIPES_DATASET, exact_title=exact_title, title_scorer=TITLE_SCORER
+        )
         print(f"🔍 Extracted Ingredients: {extracted_ingredients}")
         print(f"📌 Matched Titles: {matched_titles}")
 
@@ -82,6 +226,7 @@ def search():
 
 
 @app.route("/emissions", methods=["POST"])
+@admission_controlled("emissions")
 def emissions():
     """Calculate emissions breakdown and total emissions for given ingredients."""
     try:
@@ -105,7 +250,7 @@ def emissions():
         if EMISSIONS_DATASET is None:
             return jsonify({"error": "Emissions dataset not loaded"}), 500
 
-        matched_ingredients = match_ingredients_with_emissions(ingredients, EMISSIONS_DATASET)
+        matched_ingredients = match_ingredients_with_emissions(ingredients, EMISSIONS_DATASET, MATCH_TABLE)
         if not matched_ingredients:
             print("⚠ No matching ingredients found in emissions dataset!")
             return jsonify({"breakdown": {}, "total_emissions": 0}), 200  
@@ -123,7 +268,8 @@ def emissions():
         response = {
             "breakdown": {key: round(value, 3) for key, value in total_impact.items()},
             "total_emissions": round(total_emissions, 2),
-            "emissions_equivalence": emissions_equivalence_data
+            "emissions_equivalence": emissions_equivalence_data,
+            "lower_emissions_than_percent": lower_emissions_than_percent(total_emissions)
         }
 
         print("📌 Computed Emissions Data:", response)
@@ -135,6 +281,7 @@ def emissions():
 
 
 @app.route("/predict", methods=["POST"])
+@admission_controlled("predict")
 def predict():
     """Predict sustainability score based on emissions data."""
     try:
@@ -182,6 +329,18 @@ def predict():
 
         # Calculate total emissions
         total_emissions = sum(emissions_data.values())
+
+        # Rank against the dataset on the same total calculate_total_impact reports, which
+        # also counts the global average GHG term; without it the rank would be off-scale
+        breakdown = data.get("breakdown") if isinstance(data.get("breakdown"), dict) else {}
+        if "Total Emissions" in breakdown:
+            recipe_total = float(breakdown["Total Emissions"])
+        elif "Total Global Average GHG Emissions per kg" in breakdown:
+            recipe_total = total_emissions + float(breakdown["Total Global Average GHG Emissions per kg"])
+        elif "total_global_ghg_per_kg" in data:
+            recipe_total = total_emissions + float(data["total_global_ghg_per_kg"])
+        else:
+            recipe_total = None
         
         # Calculate sustainability score based on total emissions
         # Lower total emissions = higher sustainability score
@@ -202,7 +361,10 @@ def predict():
         print(f"📈 Sustainability Score: {sustainability_score}")
 
         response = {
-            "sustainability_score": sustainability_score
+            "sustainability_score": sustainability_score,
+            "lower_emissions_than_percent": (
+                lower_emissions_than_percent(recipe_total) if recipe_total is not None else None
+            )
         }
 
         print("📌 Computed Sustainability Score:", response)
@@ -214,7 +376,16 @@ def predict():
 
 from sustainability import get_sustainability_score  # Import your existing function
 
+def ingredient_emissions(ingredients, matched_ingredients):
+    """Per-ingredient GHG emissions for the response, looked up once per ingredient."""
+    emission_by_name = {
+        name: data.get('Total Global Average GHG Emissions per kg', 0)
+        for name, data in matched_ingredients.items()
+    }
+    return [{'name': ing, 'emission': emission_by_name.get(ing, 0)} for ing in ingredients]
+
 @app.route('/compare-dishes', methods=['POST'])
+@admission_controlled("compare-dishes")
 def compare_dishes():
     """Compare two dishes and return their sustainability metrics."""
     try:
@@ -234,8 +405,12 @@ def compare_dishes():
         print(f"🔍 Searching for dishes: {dish1_name} and {dish2_name}")  # Debug log
 
         # Extract ingredients for both dishes
-        dish1_ingredients, dish1_titles = extract_ingredients(dish1_name, RECIPES_DATASET)
-        dish2_ingredients, dish2_titles = extract_ingredients(dish2_name, RECIPES_DATASET)
+        dish1_ingredients, dish1_titles = extract_ingredients(
+            dish1_name, RECIPES_DATASET, exact_title=find_exact_title(dish1_name), title_scorer=TITLE_SCORER
+        )
+        dish2_ingredients, dish2_titles = extract_ingredients(
+            dish2_name, RECIPES_DATASET, exact_title=find_exact_title(dish2_name), title_scorer=TITLE_SCORER
+        )
 
         if not dish1_ingredients or not dish2_ingredients:
             return jsonify({"error": "Could not find recipes for one or both dishes"}), 404
@@ -258,8 +433,8 @@ def compare_dishes():
         dish2_score = get_sustainability_score(dish2['ingredients'])
 
         # Calculate emissions for ingredients
-        dish1_emissions = match_ingredients_with_emissions(dish1['ingredients'], EMISSIONS_DATASET)
-        dish2_emissions = match_ingredients_with_emissions(dish2['ingredients'], EMISSIONS_DATASET)
+        dish1_emissions = match_ingredients_with_emissions(dish1['ingredients'], EMISSIONS_DATASET, MATCH_TABLE)
+        dish2_emissions = match_ingredients_with_emissions(dish2['ingredients'], EMISSIONS_DATASET, MATCH_TABLE)
 
         # Calculate total emissions
         _, dish1_total_emissions = calculate_total_impact(dish1_emissions)
@@ -277,14 +452,14 @@ def compare_dishes():
         result = {
             'dish1': {
                 'title': dish1['title'],
-                'ingredients': [{'name': ing, 'emission': dish1_emissions.get(ing, {}).get('Total Global Average GHG Emissions per kg', 0)} for ing in dish1['ingredients']],
+                'ingredients': ingredient_emissions(dish1['ingredients'], dish1_emissions),
                 'sustainability_score': dish1_score,
                 'total_emissions': dish1_total_emissions,
                 'emissions_equivalence': dish1_equivalence
             },
             'dish2': {
                 'title': dish2['title'],
-                'ingredients': [{'name': ing, 'emission': dish2_emissions.get(ing, {}).get('Total Global Average GHG Emissions per kg', 0)} for ing in dish2['ingredients']],
+                'ingredients': ingredient_emissions(dish2['ingredients'], dish2_emissions),
                 'sustainability_score': dish2_score,
                 'total_emissions': dish2_total_emissions,
                 'emissions_equivalence': dish2_equivalence
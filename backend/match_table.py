@@ -0,0 +1,179 @@
+import atexit
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# Shared on-disk table of resolved ingredient → food product matches
+MATCH_TABLE_PATH = os.environ.get("GREENBITE_MATCH_TABLE", "C:/greenbite/datasets/ingredient_matches.db")
+
+# How often (seconds) the writer pulls matches recorded by other workers
+REFRESH_INTERVAL = 30.0
+
+def dataset_version(products):
+    """ Fingerprint the emissions product list so matches from an older dataset are ignored. """
+    digest = hashlib.sha1()
+    for product in products:
+        digest.update(str(product).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+class MatchTable:
+    """
+    Ingredient → food product matches persisted in SQLite.
+
+    Matches are served from an in-memory dict loaded at startup. New matches
+    are written back by a background thread, which also picks up rows added
+    by other workers sharing the same file.
+    """
+
+    def __init__(self, path, version):
+        self.path = path
+        self.version = version
+        self._matches = {}
+        self._pending = queue.Queue()
+        self._last_seen = 0  # highest `seq` already loaded
+        self._persist = self._prepare()
+
+        if self._persist:
+            connection = self._connect()
+            try:
+                self._refresh(connection)
+            finally:
+                connection.close()
+            self._writer = threading.Thread(target=self._write_loop, name="match-table-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.flush)
+
+    def __len__(self):
+        return len(self._matches)
+
+    def get(self, matcher, ingredient):
+        """ Return the cached (product, score) for an ingredient, or None if unseen. """
+        return self._matches.get((matcher, ingredient))
+
+    def put(self, matcher, ingredient, product, score):
+        """ Record a match in memory and queue it for the background writer. """
+        key = (matcher, ingredient)
+        if self._matches.get(key) == (product, score):
+            return
+        self._matches[key] = (product, score)
+        if self._persist:
+            self._pending.put((matcher, ingredient, product, score, time.time()))
+
+    def put_many(self, matcher, rows):
+        """ Record many (ingredient, product, score) matches and write them synchronously. """
+        now = time.time()
+        records = []
+        for ingredient, product, score in rows:
+            self._matches[(matcher, ingredient)] = (product, score)
+            records.append((matcher, ingredient, product, score, now))
+
+        if self._persist and records:
+            connection = self._connect()
+            try:
+                self._write(connection, records)
+            finally:
+                connection.close()
+
+    def flush(self, timeout=5.0):
+        """ Wait (bounded) for queued matches to reach disk. """
+        if not self._persist:
+            return
+        deadline = time.time() + timeout
+        while self._pending.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.01)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _prepare(self):
+        try:
+            connection = self._connect()
+            try:
+                # `seq` is assigned in commit order (SQLite serializes writers) and never reused,
+                # so it is a safe watermark for picking up rows written by other workers
+                connection.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS ingredient_matches (
+                        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                        matcher TEXT NOT NULL,
+                        dataset_version TEXT NOT NULL,
+                        ingredient TEXT NOT NULL,
+                        product TEXT,
+                        score REAL NOT NULL,
+                        updated_at REAL NOT NULL,
+                        UNIQUE (matcher, dataset_version, ingredient)
+                    )
+                    """
+                )
+                connection.commit()
+            finally:
+                connection.close()
+            return True
+        except sqlite3.Error as e:
+            print(f"❌ Match table unavailable at {self.path}, caching in memory only: {e}")
+            return False
+
+    def _refresh(self, connection):
+        rows = connection.execute(
+            "SELECT seq, matcher, ingredient, product, score FROM ingredient_matches "
+            "WHERE dataset_version = ? AND seq > ? ORDER BY seq",
+            (self.version, self._last_seen),
+        ).fetchall()
+        for seq, matcher, ingredient, product, score in rows:
+            self._matches[(matcher, ingredient)] = (product, score)
+            self._last_seen = seq
+        return len(rows)
+
+    def _write(self, connection, records):
+        connection.executemany(
+            "INSERT OR REPLACE INTO ingredient_matches "
+            "(matcher, dataset_version, ingredient, product, score, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            [(matcher, self.version, ingredient, product, score, updated_at)
+             for matcher, ingredient, product, score, updated_at in records],
+        )
+        connection.commit()
+
+    def _write_loop(self):
+        connection = self._connect()
+        next_refresh = time.monotonic() + REFRESH_INTERVAL
+        while True:
+            # Refresh on a timer, whether or not this worker is busy writing
+            if time.monotonic() >= next_refresh:
+                try:
+                    self._refresh(connection)
+                except sqlite3.Error as e:
+                    print(f"⚠ Match table refresh failed: {e}")
+                next_refresh = time.monotonic() + REFRESH_INTERVAL
+
+            try:
+                records = [self._pending.get(timeout=max(next_refresh - time.monotonic(), 0))]
+            except queue.Empty:
+                continue
+
+            # Batch whatever else is already queued into the same transaction
+            while True:
+                try:
+                    records.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._write(connection, records)
+            except sqlite3.Error as e:
+                print(f"❌ Error writing {len(records)} match(es) to match table: {e}")
+            finally:
+                for _ in records:
+                    self._pending.task_done()
+
+def load_match_table(products, path=MATCH_TABLE_PATH):
+    """ Open the persistent match table for the given emissions product list. """
+    table = MatchTable(path, dataset_version(products))
+    print(f"✅ Match table ready with {len(table)} cached match(es) (dataset version {table.version})")
+    return table
@@ -1,9 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 import pickle
 import numpy as np
 from pydantic import BaseModel
 import os
+import time
+from metrics import REGISTRY, CONTENT_TYPE, histogram
+from serialization import dumps, choose_encoding, compress
+from admission import AsyncAdmissionGate, Overloaded, gate_from_env
 
 # Load the trained model
 MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "sustainability_model.pkl")
@@ -15,7 +20,87 @@ except Exception as e:
     print(f"🚨 Error loading model: {e}")
     model = None  # Prevent crashes if model fails to load
 
-app = FastAPI()
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with `serialization.dumps` (orjson when installed, NumPy-aware)."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+app = FastAPI(default_response_class=FastJSONResponse)
+
+# Per-endpoint admission control; requests beyond the queue or its deadline get a fast 503
+ADMISSION_GATES = {
+    "/predict": gate_from_env("predict", max_concurrency=16, max_queue=64, deadline=0.5, gate_class=AsyncAdmissionGate),
+}
+
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    """Admit requests through their endpoint's gate, shedding load when it is saturated."""
+    gate = ADMISSION_GATES.get(request.url.path)
+    if gate is None or request.method == "OPTIONS":
+        return await call_next(request)
+
+    try:
+        await gate.acquire()
+    except Overloaded as e:
+        return FastJSONResponse(
+            {"error": "Server is busy, please retry shortly"},
+            status_code=503,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    try:
+        return await call_next(request)
+    finally:
+        gate.release()
+
+@app.get("/metrics")
+async def metrics():
+    """Expose admission and latency metrics in the Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/admission")
+async def admission_stats():
+    """Report per-endpoint admission counters, including time spent queued."""
+    return {path: gate.stats() for path, gate in ADMISSION_GATES.items()}
+
+REQUEST_LATENCY = histogram(
+    "greenbite_request_duration_seconds",
+    "Request latency per route, method and status code.",
+    ["route", "method", "status"],
+)
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Observe the request's latency in the per-route histogram."""
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    route = route.path if route is not None else "unmatched"
+    REQUEST_LATENCY.labels(route, request.method, str(response.status_code)).observe(time.perf_counter() - started)
+    return response
+
+@app.middleware("http")
+async def compress_response(request: Request, call_next):
+    """Compress large responses with the best encoding the client accepts."""
+    response = await call_next(request)
+    if "content-encoding" in response.headers:
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""), len(body))
+    if encoding:
+        body = compress(body, encoding)
+
+    compressed = Response(content=body, status_code=response.status_code, background=response.background)
+    # Keep every original header (including repeated ones such as set-cookie) except the stale length
+    compressed.raw_headers = [
+        (name, value) for name, value in response.raw_headers if name.lower() != b"content-length"
+    ] + [(b"content-length", str(len(body)).encode("latin-1"))]
+    compressed.headers["vary"] = "Accept-Encoding"
+    if encoding:
+        compressed.headers["content-encoding"] = encoding
+    return compressed
 
 # Enable CORS for frontend (React)
 app.add_middleware(
@@ -37,8 +122,10 @@ class EmissionsData(BaseModel):
     retail: float
     total_land_to_retail: float
 
+# Plain `def`: FastAPI runs it in its threadpool, so a slow model.predict doesn't block
+# the event loop and excess requests actually wait in the admission gate's queue
 @app.post("/predict")
-async def predict_sustainability(data: EmissionsData):
+def predict_sustainability(data: EmissionsData):
     if model is None:
         return {"error": "Model not loaded. Check logs for issues."}
 
@@ -0,0 +1,226 @@
+"""
+Batch sustainability scoring for menu files and supplier catalogs.
+
+Streams dish names from a CSV or JSONL file in chunks, scores them in a
+process pool (the same extract_ingredients → match_ingredients_with_emissions
+→ calculate_total_impact / get_sustainability_score pipeline as
+/compare-dishes) and appends one JSON line per dish to the output file.
+Re-running with the same output resumes where the previous run stopped,
+retrying dishes whose scoring failed for reasons other than the input.
+
+Usage:
+    python score_menu.py menu.csv scores.jsonl [--column dish] [--workers 4]
+"""
+import argparse
+import contextlib
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from autocomplete import TitleAutocomplete
+from emissions import calculate_emissions_equivalence, calculate_total_impact, load_emissions_data, match_ingredients_with_emissions
+from emissions_distribution import EMISSIONS_PATH, RECIPES_PATH
+from ingredients import extract_ingredients, load_dataset
+from match_table import load_match_table
+
+# Loaded once in the parent; forked workers share them copy-on-write
+RECIPES_DATASET = None
+EMISSIONS_DATASET = None
+TITLE_INDEX = None
+
+# Created per worker, since background threads don't survive a fork
+MATCH_TABLE = None
+get_sustainability_score = None
+
+def load_datasets(recipes_path, emissions_path):
+    global RECIPES_DATASET, EMISSIONS_DATASET, TITLE_INDEX
+    if RECIPES_DATASET is None:
+        RECIPES_DATASET = load_dataset(recipes_path)
+        EMISSIONS_DATASET = load_emissions_data(emissions_path)
+        TITLE_INDEX = TitleAutocomplete(RECIPES_DATASET["title"])
+
+def init_worker(recipes_path, emissions_path):
+    """ Process pool initializer: reuse inherited datasets (or load them) and open the match tables. """
+    global MATCH_TABLE, get_sustainability_score
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        load_datasets(recipes_path, emissions_path)
+        MATCH_TABLE = load_match_table(EMISSIONS_DATASET["Food product"])
+
+        # Imported here so its match table's writer thread starts in the worker
+        import sustainability
+
+        # sustainability.py loads its own copy of the default emissions CSV; point it at --emissions,
+        # prepared the same way (product names lower-cased, with a match table to match)
+        emissions_df = pd.read_csv(emissions_path)
+        emissions_df["Food product"] = emissions_df["Food product"].str.lower().str.strip()
+        sustainability.emissions_df = emissions_df
+        sustainability.match_table = load_match_table(emissions_df["Food product"])
+    get_sustainability_score = sustainability.get_sustainability_score
+
+def score_dish(dish_name):
+    """ Score one dish the way /compare-dishes does, using its best-matching recipe. """
+    ingredients, titles = extract_ingredients(dish_name, RECIPES_DATASET, exact_title=TITLE_INDEX.find(dish_name))
+    if not ingredients:
+        return {"error": "No matching recipe found"}
+
+    matched = match_ingredients_with_emissions(ingredients[0], EMISSIONS_DATASET, MATCH_TABLE)
+    breakdown, total_emissions = calculate_total_impact(matched)
+    score = get_sustainability_score(ingredients[0])
+    score = min(5.0, float(score)) if isinstance(score, (int, float)) else 3.0
+
+    return {
+        "title": titles[0],
+        "ingredients": ingredients[0],
+        "breakdown": {key: round(value, 3) for key, value in breakdown.items()},
+        "total_emissions": round(total_emissions, 2),
+        "emissions_equivalence": calculate_emissions_equivalence(total_emissions),
+        "sustainability_score": score,
+    }
+
+def score_chunk(chunk):
+    """ Score a list of (index, dish, error) rows, returning one result dict per dish. """
+    results = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for index, dish, error in chunk:
+            if error:
+                result = {"error": error}
+            elif not dish:
+                result = {"error": "Empty dish name"}
+            else:
+                try:
+                    result = score_dish(dish)
+                except Exception as e:
+                    # Not a problem with the dish itself (e.g. a locked match table), so retry it on resume
+                    result = {"error": str(e), "retryable": True}
+            results.append({"index": index, "dish": dish, **result})
+    return results
+
+def _json_dish(line, column):
+    """ Dish name and error message (one of them None) for one JSONL line. """
+    try:
+        row = json.loads(line)
+    except ValueError as e:
+        return None, f"Invalid JSON: {e}"
+    if isinstance(row, str):
+        return row.strip(), None
+    if isinstance(row, dict) and column in row:
+        return str(row[column]).strip(), None
+    if isinstance(row, dict):
+        return None, f"Missing '{column}' key"
+    return None, f"Expected a string or an object, got {type(row).__name__}"
+
+def _numbered(f, rows):
+    with f:
+        for index, (name, error) in enumerate(rows):
+            yield index, name, error
+
+def read_dishes(path, column):
+    """
+    Return an iterator of (index, dish name, error) rows from a CSV or JSONL file.
+
+    Raises ValueError if a CSV file has no header row or no `column` column.
+    Unreadable JSONL lines come through with an error message instead of a name.
+    """
+    f = open(path, newline="", encoding="utf-8")
+    if path.endswith(".jsonl") or path.endswith(".ndjson"):
+        return _numbered(f, (_json_dish(line, column) for line in f if line.strip()))
+
+    reader = csv.DictReader(f)
+    if not reader.fieldnames:
+        f.close()
+        raise ValueError(f"{path} is empty or has no header row")
+    if column not in reader.fieldnames:
+        f.close()
+        raise ValueError(f"Column '{column}' not found in {path} (columns: {', '.join(reader.fieldnames)})")
+    return _numbered(f, (((row.get(column) or "").strip(), None) for row in reader))
+
+def completed_indices(path):
+    """ Indices already written to the output (except retryable failures), after dropping a torn final line. """
+    if not os.path.exists(path):
+        return set()
+
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+            data = data[:data.rfind(b"\n") + 1]
+
+    done = set()
+    for line in data.splitlines():
+        try:
+            result = json.loads(line)
+            if not result.get("retryable"):
+                done.add(result["index"])
+        except (ValueError, KeyError, AttributeError):
+            continue
+    return done
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a menu or catalog of dishes for sustainability.")
+    parser.add_argument("input", help="CSV (with a header row) or JSONL file of dish names")
+    parser.add_argument("output", help="JSONL file to append results to (resumed if it exists)")
+    parser.add_argument("--column", default="dish", help="CSV column / JSON key holding the dish name")
+    parser.add_argument("--chunk-size", type=int, default=100, help="Dishes per task")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--recipes", default=RECIPES_PATH, help="Recipes dataset")
+    parser.add_argument("--emissions", default=EMISSIONS_PATH, help="Food product emissions CSV")
+    args = parser.parse_args()
+
+    # Validate the input before loading the datasets
+    try:
+        dishes = read_dishes(args.input, args.column)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+
+    done = completed_indices(args.output)
+    if done:
+        print(f"🔄 Resuming: {len(done)} dishes already scored in {args.output}")
+
+    # Fork where available so workers share the parent's datasets instead of reloading them
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    if "fork" in methods:
+        load_datasets(args.recipes, args.emissions)
+
+    pending_dishes = (row for row in dishes if row[0] not in done)
+    chunks = chunked(pending_dishes, args.chunk_size)
+
+    started = time.time()
+    scored = failed = 0
+    with open(args.output, "a", encoding="utf-8") as out, ProcessPoolExecutor(
+        max_workers=args.workers, mp_context=context,
+        initializer=init_worker, initargs=(args.recipes, args.emissions),
+    ) as pool:
+        # Keep a bounded number of chunks in flight so huge inputs stream through
+        in_flight = {pool.submit(score_chunk, chunk) for chunk in itertools.islice(chunks, args.workers * 2)}
+        while in_flight:
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                for result in future.result():
+                    out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    scored += 1
+                    failed += "error" in result
+                out.flush()
+
+                elapsed = time.time() - started
+                print(f"📊 {scored} dishes scored ({failed} with errors) - {scored / elapsed:.1f} dishes/s")
+
+                next_chunk = next(chunks, None)
+                if next_chunk:
+                    in_flight.add(pool.submit(score_chunk, next_chunk))
+
+    print(f"✅ Done: {scored} dishes in {time.time() - started:.1f}s, results in {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import gzip
+import json
+
+# Optional fast paths: orjson for encoding, brotli for compression
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = 1024
+
+GZIP_LEVEL = 6
+# Quality 6 is the lowest that beats gzip -6 on every API payload we measured
+# (bench_serialization.py); lower qualities lose to gzip on small responses
+BROTLI_QUALITY = 6
+
+def _default(obj):
+    """ Convert NumPy scalars and arrays (and other array-likes) to plain Python values. """
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if hasattr(obj, "item"):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(obj):
+    """ Serialize an object to compact UTF-8 JSON bytes. """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def loads(data):
+    """ Parse JSON from bytes or str. """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def choose_encoding(accept_encoding, size):
+    """ Pick the best content encoding the client accepts for a body of `size` bytes, or None. """
+    if size < COMPRESSION_MIN_SIZE or not accept_encoding:
+        return None
+
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, *params = part.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    # Highest q-value wins; on a tie br comes first since it compresses smaller
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    qualities = {encoding: accepted.get(encoding, accepted.get("*", 0.0)) for encoding in candidates}
+    best = max(candidates, key=lambda encoding: qualities[encoding])
+    return best if qualities[best] > 0 else None
+
+def compress(body, encoding):
+    """ Compress a response body with the given content encoding. """
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
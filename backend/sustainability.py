@@ -1,19 +1,33 @@
 import pandas as pd
 import requests
-from difflib import get_close_matches
+from difflib import get_close_matches, SequenceMatcher
 from emissions import match_ingredients_with_emissions, calculate_total_impact
+from match_table import load_match_table
 
 # Load dataset
 try:
     emissions_df = pd.read_csv("C:/greenbite/datasets/Food_Product_Emissions.csv")
     emissions_df["Food product"] = emissions_df["Food product"].str.lower().str.strip()
     print("✅ Emissions dataset loaded successfully.")
+    match_table = load_match_table(emissions_df["Food product"])
 except Exception as e:
     print(f"❌ Error loading emissions dataset: {e}")
+    match_table = None
 
 def get_best_match(ingredient):
     """Find closest match for an ingredient in the dataset."""
-    matches = get_close_matches(ingredient.lower(), emissions_df["Food product"].tolist(), n=1, cutoff=0.5)
+    key = ingredient.lower()
+    cached = match_table.get("difflib", key) if match_table is not None else None
+
+    if cached is not None:
+        matches = [cached[0]] if cached[0] is not None else []
+    else:
+        matches = get_close_matches(key, emissions_df["Food product"].tolist(), n=1, cutoff=0.5)
+        if match_table is not None:
+            if matches:
+                match_table.put("difflib", key, matches[0], SequenceMatcher(None, key, matches[0]).ratio())
+            else:
+                match_table.put("difflib", key, None, 0.0)
 
     if matches:
         print(f"🔍 Best match for '{ingredient}': {matches[0]}")
@@ -27,7 +41,7 @@ def get_sustainability_score(ingredients):
     print(f"🧐 Debug: Processing ingredients → {ingredients}")  # ✅ Debug ingredient list
 
     # First, calculate the total emissions for the dish
-    matched_ingredients = match_ingredients_with_emissions(ingredients, emissions_df)
+    matched_ingredients = match_ingredients_with_emissions(ingredients, emissions_df, match_table)
     _, total_emissions = calculate_total_impact(matched_ingredients)
     
     print(f"📊 Debug: Total emissions for the dish → {total_emissions}")  # ✅ Debug total emissions
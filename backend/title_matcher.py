@@ -0,0 +1,62 @@
+import heapq
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from rapidfuzz import fuzz, process
+from thefuzz import utils
+
+def _preprocess(text):
+    """ The preprocessing thefuzz applies to WRatio choices (ASCII only, lower case, alphanumerics). """
+    return utils.full_process(text, force_ascii=True)
+
+class ChunkedTitleScorer:
+    """
+    Multi-core replacement for `thefuzz.process.extract` over a fixed title array.
+
+    Titles are preprocessed once and split into chunks. Each query scores the
+    chunks in parallel (rapidfuzz releases the GIL while scoring) with the score
+    cutoff pushed into the scorer, keeps the top `limit` of every chunk and
+    merges them. Results match thefuzz: (title, rounded score) pairs ordered by
+    score, ties in title order.
+    """
+
+    def __init__(self, titles, chunk_size=50000, workers=None):
+        self._titles = list(titles)
+        processed = [_preprocess(title) for title in self._titles]
+        self._chunks = [(start, processed[start:start + chunk_size]) for start in range(0, len(processed), chunk_size)]
+        self._pool = ThreadPoolExecutor(max_workers=workers or os.cpu_count(), thread_name_prefix="title-scorer")
+
+    def __len__(self):
+        return len(self._titles)
+
+    def _score_chunk(self, query, start, chunk, limit, score_cutoff):
+        """ Top `limit` (-score, index) pairs of one chunk. """
+        scores = process.cdist([query], chunk, scorer=fuzz.WRatio, score_cutoff=score_cutoff,
+                               dtype=np.float64, workers=1)[0]
+        if score_cutoff > 0:
+            candidates = np.flatnonzero(scores >= score_cutoff)
+        else:
+            candidates = np.arange(len(scores))
+
+        if len(candidates) > limit:
+            # Keep everything tied with the limit-th best score, then break ties by title order
+            kth = np.partition(scores[candidates], len(candidates) - limit)[len(candidates) - limit]
+            candidates = candidates[scores[candidates] >= kth]
+            candidates = candidates[np.lexsort((candidates, -scores[candidates]))[:limit]]
+        return [(-scores[i], start + int(i)) for i in candidates]
+
+    def extract(self, query, limit=5, score_cutoff=0):
+        """ Best `limit` titles for the query as (title, score) pairs, skipping scores below `score_cutoff`. """
+        query = _preprocess(utils.full_process(query))
+
+        # thefuzz rounds scores, so anything that rounds up to the cutoff must survive the scorer
+        scorer_cutoff = max(score_cutoff - 0.5, 0)
+        futures = [
+            self._pool.submit(self._score_chunk, query, start, chunk, limit, scorer_cutoff)
+            for start, chunk in self._chunks
+        ]
+        best = heapq.nsmallest(limit, (pair for future in futures for pair in future.result()))
+
+        matches = [(self._titles[index], int(round(-negative_score))) for negative_score, index in best]
+        return [match for match in matches if match[1] >= score_cutoff]
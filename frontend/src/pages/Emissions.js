@@ -38,6 +38,7 @@ const Emissions = () => {
             packaging: emissionsData.breakdown["Packaging"] || 0,
             retail: emissionsData.breakdown["Retail"] || 0,
             total_land_to_retail: emissionsData.breakdown["Total from Land to Retail"] || 0,
+            total_global_ghg_per_kg: emissionsData.breakdown["Total Global Average GHG Emissions per kg"] || 0,
         };
 
         console.log("Sending emissions data to predict endpoint:", requestData); // Debug log